@@ -24,6 +24,9 @@ __author__ = "Michael Cohen <scudette@google.com>"
 from rekall_agent import action
 from rekall_agent import result_collections
 
+# Number of rows to buffer before flushing them into the collection.
+INSERT_BATCH_SIZE = 10000
+
 
 class CollectAction(action.Action):
     """Collect the results of an efilter query into a collection."""
@@ -40,12 +43,18 @@ class CollectAction(action.Action):
     ]
 
     def collect(self):
-        """A row generator of collections."""
+        """A row generator of collections.
+
+        Rows are yielded as tuples in the column order of the collection's
+        table so they can be inserted directly.
+        """
+        columns = [x.name for x in self.collection.tables[0].columns]
+
         # Insert data into the collection.
         for match in self._session.plugins.search(
                 query=self.query,
                 query_parameters=self.query_parameters).collect():
-            yield match.ordered_dict
+            yield tuple(match.get(column) for column in columns)
 
     def run(self):
         # Only a single table is supported in the collection spec.
@@ -54,8 +63,15 @@ class CollectAction(action.Action):
 
         # Open the collection for writing.
         self.collection.open("w")
+        rows = []
         for row in self.collect():
-            self.collection.insert(row=row)
+            rows.append(row)
+            if len(rows) >= INSERT_BATCH_SIZE:
+                self.collection.insert_values(rows)
+                rows = []
+
+        if rows:
+            self.collection.insert_values(rows)
 
         # We are done.
         self.collection.close()
@@ -66,12 +66,8 @@ class TestCollectClientAction(testlib.RekallBaseUnitTestCase):
     def setUp(self):
         self.session = self.MakeUserSession()
 
-    def testCollectionAction(self):
-        # The path where we want the collection to finally reside.
-        final_path = os.path.join(self.temp_directory, "test.sqlite")
-
-        # Make a SQL Collection.
-        collection = result_collections.GenericSQLiteCollection.from_keywords(
+    def _make_collection(self, final_path):
+        return result_collections.GenericSQLiteCollection.from_keywords(
             session=self.session,
             # Store the file locally.
             location=files.FileLocation.from_keywords(
@@ -83,15 +79,17 @@ class TestCollectClientAction(testlib.RekallBaseUnitTestCase):
                                   dict(name="c3", type="float")])],
         )
 
-        # Create a request to the agect_collection.
-        request = collect.CollectActionRequest.from_keywords(
+    def testCollectionAction(self):
+        # The path where we want the collection to finally reside.
+        final_path = os.path.join(self.temp_directory, "test.sqlite")
+
+        # Run the action with a real select query.
+        action = collect.CollectAction.from_keywords(
             session=self.session,
             query="select c1, c2, c3 from test_collection_plugin()",
-            collection=collection,
+            collection=self._make_collection(final_path),
         )
-
-        # Run the plugin and collect the output.
-        collect.CollectAction(request, session=self.session).collect()
+        action.run()
 
         # Now check that the collection is complete with direct SQL.
         conn = sqlite3.connect(final_path)
@@ -100,6 +98,22 @@ class TestCollectClientAction(testlib.RekallBaseUnitTestCase):
         self.assertEqual(len(data), 2)
         self.assertEqual(data, FAKE_DATA)
 
+    def testCollectionActionMissingColumn(self):
+        final_path = os.path.join(self.temp_directory, "test_missing.sqlite")
+
+        # Columns not selected by the query are stored as NULL.
+        action = collect.CollectAction.from_keywords(
+            session=self.session,
+            query="select c1, c2 from test_collection_plugin()",
+            collection=self._make_collection(final_path),
+        )
+        action.run()
+
+        conn = sqlite3.connect(final_path)
+        data = list(conn.execute("select * from tbl_default"))
+
+        self.assertEqual(data, [(1, "a", None), (2, "b", None)])
+
 
 if __name__ == "__main__":
     testlib.main()
@@ -50,7 +50,7 @@ class GetFiles(collect.CollectAction):
                 continue
 
             # Try to detect files as instances if FileSpec.
-            for path in row.itervalues():
+            for path in row:
                 if isinstance(path, common.FileSpec):
                     file_info = common.FileInformation.from_stat(
                         path, session=self._session)
@@ -23,10 +23,19 @@
 __author__ = "Michael Cohen <scudette@google.com>"
 
 """Defines the basic agent configuration system."""
+import copy
 import json
 import os
 
+try:
+    # ujson is much faster for parsing the config and writeback files. We do
+    # not use it for writing since its encoder loses float precision.
+    from ujson import loads as json_loads
+except ImportError:
+    json_loads = json.loads
+
 from rekall import obj
+from rekall import utils
 from rekall_agent import action
 from rekall_agent import crypto
 from rekall_agent import location
@@ -68,6 +77,53 @@ class SignedManifest(serializer.SerializedObject):
     ]
 
 
+# A cache of file contents referenced by configuration files. The same
+# certificates are typically referenced from several fields.
+_FILE_CACHE = utils.FastStore(max_size=128)
+
+
+def _read_file(path):
+    """Reads the file at path, caching its content by path, mtime and size."""
+    stat = os.stat(path)
+    key = (path, stat.st_mtime, stat.st_size)
+    try:
+        return _FILE_CACHE.Get(key)
+    except KeyError:
+        with open(path, "rb") as fd:
+            data = fd.read()
+
+        _FILE_CACHE.Put(key, data)
+        return data
+
+
+# Caches the parsed writeback files: path -> ((mtime, size), data). The
+# writeback only changes through save_writeback() so there is no need to parse it
+# each time the client policy is loaded. The size is part of the key since mtime
+# resolution may be as coarse as a second on some filesystems. Callers always
+# get their own copy of the data since deserialized objects may keep references
+# to it.
+_WRITEBACK_CACHE = {}
+
+
+def _writeback_cache_key(path):
+    stat = os.stat(path)
+    return stat.st_mtime, stat.st_size
+
+
+def _load_writeback_data(path):
+    """Returns the parsed json data in the writeback file at path."""
+    key = _writeback_cache_key(path)
+    cached = _WRITEBACK_CACHE.get(path)
+    if cached is not None and cached[0] == key:
+        return copy.deepcopy(cached[1])
+
+    with open(path, "rb") as fd:
+        data = json_loads(fd.read())
+
+    _WRITEBACK_CACHE[path] = (key, data)
+    return copy.deepcopy(data)
+
+
 class ExternalFileMixin(object):
     """This mixin allows parameters to be defined using filter notation.
 
@@ -81,6 +137,29 @@ class ExternalFileMixin(object):
     can be found.
     """
 
+    # Maps filter names to the methods which handle them.
+    _HANDLERS = {
+        "env": "_handle_env",
+        "file": "_handle_file",
+        "json_file": "_handle_json_file",
+    }
+
+    # Maps primitive keys to their (field_name, filter_name). The same keys
+    # are seen every time a configuration is loaded so we only parse them once.
+    _field_map = {}
+
+    @classmethod
+    def _parse_field(cls, key):
+        result = cls._field_map.get(key)
+        if result is None:
+            field_name, sep, filter_name = key.partition("@")
+            if not sep:
+                filter_name = None
+
+            result = cls._field_map[key] = (field_name, filter_name)
+
+        return result
+
     @classmethod
     def from_primitive(cls, data, session=None):
         if not data:
@@ -91,54 +170,58 @@ class ExternalFileMixin(object):
 
         result = {}
         for k, v in data.iteritems():
-            if "@" in k:
-                field_name, filter_name = k.split("@", 1)
-                if filter_name == "env":
-                    if v in os.environ:
-                        session.logging.info(
-                            "Fetching %s from env %s", field_name, v)
-                        result[field_name] = json.loads(os.environ[v])
-                elif filter_name == "file":
-                    file_data = cls._locate_file_data_in_search_path(
-                        v, search_path)
-                    if file_data is None:
-                        session.logging.warn(
-                            "Unable to find file %s for field %s", v,
-                            field_name)
-                    else:
-                        result[field_name] = file_data
-
-                elif filter_name == "json_file":
-                    file_data = cls._locate_file_data_in_search_path(
-                        v, search_path)
-                    if file_data is None:
-                        session.logging.warn(
-                            "Unable to find file %s for field %s", v,
-                            field_name)
-                    else:
-                        result[field_name] = json.loads(file_data)
-
-            else:
+            field_name, filter_name = cls._parse_field(k)
+            if filter_name is None:
                 result[k] = v
+                continue
+
+            handler = cls._HANDLERS.get(filter_name)
+            if handler is not None:
+                value = getattr(cls, handler)(
+                    field_name, v, session, search_path)
+                if value is not None:
+                    result[field_name] = value
 
         return super(ExternalFileMixin, cls).from_primitive(
             result, session=session)
 
+    @classmethod
+    def _handle_env(cls, field_name, env_name, session, _):
+        if env_name in os.environ:
+            session.logging.info(
+                "Fetching %s from env %s", field_name, env_name)
+            return json_loads(os.environ[env_name])
+
+    @classmethod
+    def _handle_file(cls, field_name, path, session, search_path):
+        file_data = cls._locate_file_data_in_search_path(path, search_path)
+        if file_data is None:
+            session.logging.warn(
+                "Unable to find file %s for field %s", path, field_name)
+
+        return file_data
+
+    @classmethod
+    def _handle_json_file(cls, field_name, path, session, search_path):
+        file_data = cls._handle_file(field_name, path, session, search_path)
+        if file_data is not None:
+            return json_loads(file_data)
+
     @staticmethod
     def _locate_file_data_in_search_path(path, search_paths):
         # Allow homedir and environment vars to be specified.
         path = os.path.expandvars(os.path.expanduser(path))
         if os.path.isabs(path):
-            try:
-                return open(path, "rb").read()
-            except IOError:
-                return
+            candidates = [path]
         else:
-            for search in search_paths:
+            candidates = [os.path.join(search, path)
+                          for search in search_paths]
+
+        for path_to_try in candidates:
+            if os.path.isfile(path_to_try):
                 try:
-                    path_to_try = os.path.join(search, path)
-                    return open(path_to_try, "rb").read()
-                except IOError:
+                    return _read_file(path_to_try)
+                except (IOError, OSError):
                     continue
 
 
@@ -197,10 +280,10 @@ class ClientPolicy(ExternalFileMixin,
             try:
                 session.logging.debug(
                     "Will load writeback from %s", result.writeback_path)
-                with open(result.writeback_path, "rb") as fd:
-                    result.set_writeback(ClientWriteback.from_primitive(
-                        session=session, data=json.loads(fd.read())))
-            except (IOError, TypeError, AttributeError):
+                result.set_writeback(ClientWriteback.from_primitive(
+                    session=session,
+                    data=_load_writeback_data(result.writeback_path)))
+            except (IOError, OSError, TypeError, AttributeError):
                 pass
 
         return result
@@ -218,8 +301,12 @@ class ClientPolicy(ExternalFileMixin,
     def save_writeback(self):
         self._session.logging.debug(
             "Updating writeback %s", self.writeback_path)
+        data = self._writeback.to_primitive()
         with open(self.writeback_path, "wb") as fd:
-            fd.write(self._writeback.to_json())
+            fd.write(json.dumps(data, sort_keys=True))
+
+        _WRITEBACK_CACHE[self.writeback_path] = (
+            _writeback_cache_key(self.writeback_path), copy.deepcopy(data))
 
 
 class ServerPolicy(ExternalFileMixin,
@@ -0,0 +1,53 @@
+import json
+import os
+
+from rekall import testlib
+from rekall_agent.config import agent
+
+
+class TestClientWriteback(testlib.RekallBaseUnitTestCase):
+    """Test loading and saving the client writeback."""
+
+    def setUp(self):
+        self.session = self.MakeUserSession()
+        self.writeback_path = os.path.join(self.temp_directory, "writeback")
+
+    def _load_policy(self):
+        return agent.ClientPolicy.from_primitive(
+            dict(writeback_path=self.writeback_path), session=self.session)
+
+    def _rewrite(self, data, mtime):
+        with open(self.writeback_path, "wb") as fd:
+            fd.write(json.dumps(data))
+
+        os.utime(self.writeback_path, (mtime, mtime))
+
+    def testSaveAndReload(self):
+        policy = self._load_policy()
+        policy.set_writeback(agent.ClientWriteback.from_keywords(
+            session=self.session, client_id="C.1"))
+        policy.save_writeback()
+
+        self.assertEqual(self._load_policy().client_id, "C.1")
+
+        # Changing the returned data must not affect later loads.
+        data = agent._load_writeback_data(self.writeback_path)
+        data["client_id"] = "C.2"
+        self.assertEqual(self._load_policy().client_id, "C.1")
+
+    def testCacheInvalidation(self):
+        mtime = int(os.stat(self.temp_directory).st_mtime)
+        self._rewrite(dict(client_id="C.1"), mtime)
+        self.assertEqual(self._load_policy().client_id, "C.1")
+
+        # A different size with the same mtime forces a re-read.
+        self._rewrite(dict(client_id="C.22"), mtime)
+        self.assertEqual(self._load_policy().client_id, "C.22")
+
+        # So does a different mtime with the same size.
+        self._rewrite(dict(client_id="C.33"), mtime + 10)
+        self.assertEqual(self._load_policy().client_id, "C.33")
+
+
+if __name__ == "__main__":
+    testlib.main()
@@ -25,6 +25,7 @@ __author__ = "Michael Cohen <scudette@google.com>"
 """This plugin implements the config_updater initialization tool.
 """
 import os
+import string
 import time
 
 from rekall import plugin
@@ -35,6 +36,13 @@ from rekall_agent.config import agent
 from rekall_agent.client_actions import interrogate
 
 
+def _try_read(path):
+    """Returns the content of path or None if it does not exist."""
+    if os.path.isfile(path):
+        with open(path, "rb") as fd:
+            return fd.read()
+
+
 class AgentServerInitialize(plugin.TypedProfileCommand, plugin.Command):
     """The base config initialization plugin.
 
@@ -70,16 +78,39 @@ class AgentServerInitialize(plugin.TypedProfileCommand, plugin.Command):
         ca_cert_filename = os.path.join(
             self.config_dir, self.ca_cert_filename)
 
-        try:
-            ca_private_key = crypto.RSAPrivateKey.from_primitive(open(
-                ca_private_key_filename).read(), session=self.session)
+        server_private_key_filename = os.path.join(
+            self.config_dir, self.server_private_key_filename)
+
+        server_certificate_filename = os.path.join(
+            self.config_dir, self.server_certificate_filename)
+
+        ca_private_key_data = _try_read(ca_private_key_filename)
+        ca_cert_data = _try_read(ca_cert_filename)
+        server_private_key_data = _try_read(server_private_key_filename)
+        server_certificate_data = _try_read(server_certificate_filename)
+
+        reuse_ca_keys = (ca_private_key_data is not None and
+                         ca_cert_data is not None)
+        reuse_server_keys = (server_private_key_data is not None and
+                             server_certificate_data is not None)
+
+        # If we need to make both keys, generate the server key while we are
+        # busy with the CA key.
+        server_key_generator = None
+        if not reuse_ca_keys and not reuse_server_keys:
+            server_key_generator = common.THREADPOOL.apply_async(
+                crypto.RSAPrivateKey(session=self.session).generate_key)
+
+        if reuse_ca_keys:
+            ca_private_key = crypto.RSAPrivateKey.from_primitive(
+                ca_private_key_data, session=self.session)
 
-            ca_cert = crypto.X509Ceritifcate.from_primitive(open(
-                ca_cert_filename).read(), session=self.session)
+            ca_cert = crypto.X509Ceritifcate.from_primitive(
+                ca_cert_data, session=self.session)
 
             yield dict(Message="Reusing existing CA keys in %s" %
                        ca_cert_filename)
-        except IOError:
+        else:
             yield dict(
                 Message="Generating new CA private key into %s and %s" % (
                     ca_private_key_filename, ca_cert_filename))
@@ -94,27 +125,24 @@ class AgentServerInitialize(plugin.TypedProfileCommand, plugin.Command):
                 fd.write(ca_cert.to_primitive())
 
         # Now same thing with the server keys.
-        server_private_key_filename = os.path.join(
-            self.config_dir, self.server_private_key_filename)
-
-        server_certificate_filename = os.path.join(
-            self.config_dir, self.server_certificate_filename)
+        if reuse_server_keys:
+            server_private_key = crypto.RSAPrivateKey.from_primitive(
+                server_private_key_data, session=self.session)
 
-        try:
-            server_private_key = crypto.RSAPrivateKey.from_primitive(open(
-                server_private_key_filename).read(), session=self.session)
-
-            server_certificate = crypto.X509Ceritifcate.from_primitive(open(
-                server_certificate_filename).read(), session=self.session)
+            server_certificate = crypto.X509Ceritifcate.from_primitive(
+                server_certificate_data, session=self.session)
 
             yield dict(Message="Reusing existing server keys in %s" %
                        server_certificate_filename)
-        except IOError:
+        else:
             yield dict(
                 Message="Generating new Server private keys into %s and %s" % (
                     server_private_key_filename, server_certificate_filename))
-            server_private_key = crypto.RSAPrivateKey(
-                session=self.session).generate_key()
+            if server_key_generator is not None:
+                server_private_key = server_key_generator.get()
+            else:
+                server_private_key = crypto.RSAPrivateKey(
+                    session=self.session).generate_key()
 
             with open(server_private_key_filename, "wb") as fd:
                 fd.write(server_private_key.to_primitive())
@@ -153,29 +181,29 @@ class AgentServerInitializeGCS(AgentServerInitialize):
 
     name = "agent_server_initialize_gcs"
 
-    server_config_template = """
-ca_certificate@file: {ca_cert_filename}
+    server_config_template = string.Template("""
+ca_certificate@file: ${ca_cert_filename}
 server:
   __type__: GCSServerPolicy
-  bucket: {bucket}
-  ticket_bucket: {bucket}
-  service_account@json_file: {service_account}
-  certificate@file: {server_certificate_filename}
-  private_key@file: {server_private_key_filename}
-"""
-    client_config_template = """
-ca_certificate@file: {ca_cert_filename}
+  bucket: ${bucket}
+  ticket_bucket: ${bucket}
+  service_account@json_file: ${service_account}
+  certificate@file: ${server_certificate_filename}
+  private_key@file: ${server_private_key_filename}
+""")
+    client_config_template = string.Template("""
+ca_certificate@file: ${ca_cert_filename}
 client:
   __type__: GCSAgentPolicy
   manifest_location:
     __type__: GCSUnauthenticatedLocation
-    bucket: {bucket}
+    bucket: ${bucket}
     path: manifest
 
-  writeback_path: {writeback_path}
+  writeback_path: ${writeback_path}
   labels:
     - All
-"""
+""")
 
     manifest_file_template = """
 
@@ -203,7 +231,8 @@ client:
             writeback_path=self.plugin_args.client_writeback_path,
         )
 
-        client_config_data = self.client_config_template.format(**parameters)
+        client_config_data = self.client_config_template.substitute(
+            parameters)
         client_config_filename = os.path.join(
             self.config_dir, self.client_config_filename)
 
@@ -213,7 +242,8 @@ client:
         with open(client_config_filename, "wb") as fd:
             fd.write(client_config_data)
 
-        server_config_data = self.server_config_template.format(**parameters)
+        server_config_data = self.server_config_template.substitute(
+            parameters)
         server_config_data += client_config_data
 
         server_config_filename = os.path.join(
@@ -261,16 +291,16 @@ client:
             ]
         )
 
-        # Now create a signed manifest.
+        # Now create a signed manifest. The manifest is serialized only once
+        # and the same data is both signed and stored.
+        manifest_data = manifest.to_json()
         signed_manifest = agent.SignedManifest.from_keywords(
             session=self.session,
-            data=manifest.to_json(),
+            data=manifest_data,
+            signature=self.config.server.private_key.sign(manifest_data),
             server_certificate=self.config.server.certificate,
         )
 
-        signed_manifest.signature = self.config.server.private_key.sign(
-            signed_manifest.data)
-
         # Now upload the signed manifest to the bucket. Manifest must be
         # publicly accessible.
         upload_location = sa.create_oauth_location(
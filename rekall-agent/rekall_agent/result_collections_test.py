@@ -75,6 +75,27 @@ class TestResultCollection(testlib.RekallBaseUnitTestCase):
         self.assertEqual([tuple(x) for x in collection.query()],
                          [(5, "foobar", 1.1)])
 
+    def testInsertValues(self):
+        final_path = os.path.join(self.temp_directory, "test_values.sqlite")
+        collection = result_collections.GenericSQLiteCollection.from_keywords(
+            session=self.session,
+            location=files.FileLocation.from_keywords(
+                session=self.session,
+                path=final_path),
+            tables=[dict(name="default",
+                         columns=[dict(name="c1", type="int"),
+                                  dict(name="c2", type="unicode"),
+                                  dict(name="c3", type="float")])],
+        )
+
+        collection.open(mode="w")
+        collection.insert_values([(1, "a", 1.5), ("2", None, 2)])
+        collection.close()
+
+        collection.open("r")
+        self.assertEqual([tuple(x) for x in collection.query()],
+                         [(1, "a", 1.5), (2, None, 2.0)])
+
 
 if __name__ == "__main__":
     testlib.main()
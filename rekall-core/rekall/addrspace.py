@@ -648,6 +648,27 @@ class RunBasedAddressSpace(PagedReader):
                              file_offset=file_address,
                              data=data))
 
+    def add_runs(self, runs, address_space=None):
+        """Add many runs at once.
+
+        Args:
+          runs: An iterable of (virt_addr, file_address, file_len) tuples.
+          address_space: The address space backing all the runs.
+        """
+        if address_space is None:
+            address_space = self.base
+
+        def _build():
+            for virt_addr, file_address, file_len in runs:
+                start = virt_addr
+                end = virt_addr + file_len
+                yield start, end, Run(start=start,
+                                      end=end,
+                                      address_space=address_space,
+                                      file_offset=file_address)
+
+        self.runs.update(_build())
+
     def _read_chunk(self, addr, length):
         """Read from addr as much as possible up to a length of length."""
         start, end, run = self.runs.get_containing_range(addr)
@@ -139,6 +139,23 @@ class RunBasedTest(testlib.RekallBaseUnitTestCase):
         self.assertEqual(run.start, 1020)
         self.assertEqual(run.end, 1030)
 
+    def testAddRuns(self):
+        """add_runs must produce the same mappings as repeated add_run."""
+        test_as = CustomRunsAddressSpace(session=self.session, runs=[],
+                                         data="0123456789")
+        test_as.add_runs([(1000, 0, 10),
+                          (1020, 40, 10),
+                          (1030, 50, 10),
+                          (1050, 0, 2),
+                          (1052, 5, 2)])
+
+        self.assertEqual(
+            [(r.start, r.end, r.file_offset) for r in test_as.get_mappings()],
+            [(r.start, r.end, r.file_offset)
+             for r in self.test_as.get_mappings()])
+
+        self.assertEqual(test_as.read(1050, 4), "0156")
+
 
 if __name__ == "__main__":
     logging.basicConfig(level=logging.DEBUG)
@@ -30,9 +30,14 @@ For this address space to work:
 pip install pyaff4
 
 """
+import bisect
 import logging
 import re
 import os
+import sys
+import threading
+import weakref
+import Queue
 
 from pyaff4 import data_store
 try:
@@ -49,6 +54,7 @@ from pyaff4 import plugins  # pylint: disable=unused-import
 
 from rekall import addrspace
 from rekall import cache
+from rekall import config
 from rekall import yaml_utils
 from rekall import utils
 from rekall.plugins.addrspaces import standard
@@ -57,20 +63,192 @@ from rekall.plugins.addrspaces import standard
 LOGGER = logging.getLogger("pyaff4")
 LOGGER.setLevel(logging.ERROR)
 
+config.DeclareOption(
+    "--aff4_prefetch", default=False, type="Boolean",
+    help="Prefetch AFF4 image data in a background thread when reading "
+    "sequentially. Useful for images on high latency storage.")
+
+# Matches windows filenames (e.g. /c:/windows/notepad.exe).
+WINDOWS_PATH_REGEX = re.compile(r"/?([a-zA-Z]:[/\\].+)")
+
+
+# The same filenames are normalized over and over again so we cache them.
+NORMALIZED_FILENAMES = utils.FastStore(max_size=8192, lock=True)
+
+
+def NormalizeFilename(filename):
+    """Normalize the filename based on the source OS."""
+    # Windows filenames must have the drive letter near the start so we can
+    # avoid the regex for most other filenames.
+    if ":" not in filename[:3]:
+        return filename
+
+    try:
+        return NORMALIZED_FILENAMES.Get(filename)
+    except KeyError:
+        pass
+
+    result = filename
+    m = WINDOWS_PATH_REGEX.match(filename)
+    if m:
+        # This is a windows filename.
+        result = m.group(1).replace("/", "\\").lower()
+
+    NORMALIZED_FILENAMES.Put(filename, result)
+    return result
+
+
+def _PrefetchWorker(wrapper_ref, queue, timeout):
+    """Reads the blocks scheduled in queue into the wrapper's cache.
+
+    A block number of None stops the worker. The worker also exits once the
+    wrapper is gone, which it checks at least every timeout seconds.
+    """
+    while True:
+        try:
+            block_number = queue.get(timeout=timeout)
+        except Queue.Empty:
+            if wrapper_ref() is None:
+                return
+
+            continue
+
+        if block_number is None:
+            return
+
+        wrapper = wrapper_ref()
+        if wrapper is None:
+            return
+
+        _PrefetchBlock(wrapper, block_number)
+
+        # Do not keep the wrapper alive while waiting for more work.
+        wrapper = None
+
+
+def _PrefetchBlock(wrapper, block_number):
+    # Errors are handled in their own frame so the traceback (which refers to
+    # the wrapper) does not outlive this call.
+    try:
+        if block_number not in wrapper._cache:
+            wrapper._read_block(block_number)
+    except Exception as e:  # pylint: disable=broad-except
+        logging.debug("Unable to prefetch AFF4 block %s: %s", block_number, e)
+
+
+def _StopPrefetchWorker(queue):
+    try:
+        queue.put_nowait(None)
+    except Queue.Full:
+        # The worker will notice the wrapper is gone after the next block.
+        pass
+
 
 class AFF4StreamWrapper(object):
-    def __init__(self, stream):
+    # Small reads are served from a cache of blocks of this size. Reading
+    # through pyaff4 is expensive so it is better to read larger blocks.
+    BLOCK_SIZE = 64 * 1024
+    CACHE_SIZE = 4
+
+    # How many blocks ahead to prefetch when reading sequentially.
+    PREFETCH_BLOCKS = 2
+
+    # How often an idle prefetch thread checks if the wrapper is still alive.
+    PREFETCH_TIMEOUT = 10
+
+    def __init__(self, stream, cache=False, prefetch=False):
         self.stream = stream
 
+        # The urn does not change so only convert it once.
+        self._urn_unicode = utils.SmartUnicode(stream.urn)
+        self._lock = threading.Lock()
+
+        # Address spaces which already cache reads (e.g. the AFF4AddressSpace
+        # itself) do not need a block cache. Prefetching reads into the cache
+        # so it always needs one.
+        self._cache = None
+        if cache or prefetch:
+            self._cache = utils.FastStore(max_size=self.CACHE_SIZE, lock=True)
+
+        self._last_block = None
+        self._prefetch_queue = None
+        self._prefetch_worker = None
+        if prefetch:
+            queue = Queue.Queue(self.PREFETCH_BLOCKS * 2)
+            self._prefetch_queue = queue
+
+            # The worker only holds a weak reference so it does not keep the
+            # wrapper alive. It is stopped by close(), or when the wrapper is
+            # freed. Wrappers freed by the cycle collector do not run the
+            # weakref callback so the worker also polls the reference.
+            self._prefetch_worker = threading.Thread(
+                target=_PrefetchWorker,
+                args=(weakref.ref(self), queue, self.PREFETCH_TIMEOUT))
+            self._prefetch_worker.daemon = True
+            self._prefetch_worker.start()
+
+            self._closer = weakref.ref(
+                self, lambda _: _StopPrefetchWorker(queue))
+
+    def close(self):
+        """Stops the prefetch thread if there is one."""
+        queue, self._prefetch_queue = self._prefetch_queue, None
+        if queue is not None:
+            # The worker is draining the queue so this will not block long.
+            queue.put(None)
+
+    def _read_stream(self, offset, length):
+        # The stream may be shared with the prefetch thread.
+        with self._lock:
+            self.stream.seek(offset)
+            return self.stream.read(length)
+
+    def _read_block(self, block_number):
+        try:
+            return self._cache.Get(block_number)
+        except KeyError:
+            data = self._read_stream(
+                block_number * self.BLOCK_SIZE, self.BLOCK_SIZE)
+            self._cache.Put(block_number, data)
+
+            return data
+
+    def _prefetch(self, block_number):
+        """Schedule reading the next blocks if we are reading sequentially."""
+        last_block = self._last_block
+        if block_number == last_block:
+            return
+
+        if last_block is not None and block_number == last_block + 1:
+            for i in range(1, self.PREFETCH_BLOCKS + 1):
+                try:
+                    self._prefetch_queue.put_nowait(block_number + i)
+                except Queue.Full:
+                    break
+
+        self._last_block = block_number
+
     def read(self, offset, length):
-        self.stream.seek(offset)
-        return self.stream.read(length)
+        if self._cache is None:
+            return self._read_stream(offset, length)
+
+        block_number, block_offset = divmod(offset, self.BLOCK_SIZE)
+
+        # Reads which span blocks are not cached.
+        if block_offset + length > self.BLOCK_SIZE:
+            return self._read_stream(offset, length)
+
+        if self._prefetch_queue is not None:
+            self._prefetch(block_number)
+
+        data = self._read_block(block_number)
+        return data[block_offset:block_offset + length]
 
     def end(self):
         return self.stream.Size()
 
     def __unicode__(self):
-        return utils.SmartUnicode(self.stream.urn)
+        return self._urn_unicode
 
 
 class AFF4AddressSpace(addrspace.CachingAddressSpaceMixIn,
@@ -127,6 +305,27 @@ class AFF4AddressSpace(addrspace.CachingAddressSpaceMixIn,
         # A map between the filename and the offset it is mapped into the
         # address space.
         self.mapped_files = {}
+
+        # Filenames which are not present in the AFF4 volume.
+        self.missing_files = set()
+
+        # The last (start, end, run) found by describe().
+        self._describe_cache = None
+        self._physical_starts = []
+        self._physical_ends = []
+
+        # A map between the filenames in the volume and their subjects. This
+        # is built on demand by _ensure_filenames().
+        self._filenames = None
+        self._lower_filenames = None
+        self.volume_urn = None
+
+        # The offset where the next file will be mapped.
+        self._next_mapping_offset = None
+
+        # The parsed information.yaml from the image.
+        self._metadata = None
+
         try:
             volume_path, stream_path = self._LocateAFF4Volume(path)
         except IOError as e:
@@ -155,136 +354,204 @@ class AFF4AddressSpace(addrspace.CachingAddressSpaceMixIn,
                     stream_path, e))
 
     def _LocateAFF4Volume(self, filename):
+        """Find the AFF4 volume containing filename.
+
+        Returns a tuple of the volume URN and the path of the stream within the
+        volume (or None if filename refers to the volume itself).
+        """
+        volume_urn = rdfvalue.URN.NewURNFromFilename(filename)
+        scheme = volume_urn.Parse().scheme
+        if scheme == "gs" and aff4_cloud:
+            with aff4_cloud.AFF4GStore.NewAFF4GStore(
+                    self.resolver, volume_urn) as volume:
+                return volume.urn, None
+
+        if scheme != "file":
+            raise IOError("Not found")
+
+        if os.path.isdir(filename):
+            with aff4_directory.AFF4Directory.NewAFF4Directory(
+                    self.resolver, volume_urn) as volume:
+                return volume.urn, None
+
+        # Find the longest prefix of the path which is an existing file - this
+        # must be the volume and the rest of the path is the stream inside it.
+        # Stat is cheap so we only open the volume once we found it.
         stream_name = []
-        path_components = list(filename.split(os.sep))
+        path_components = filename.split(os.sep)
         while path_components:
             volume_path = os.sep.join(path_components)
-            volume_urn = rdfvalue.URN.NewURNFromFilename(volume_path)
-            volume_urn_parts = volume_urn.Parse()
-
-            if volume_urn_parts.scheme == "file":
-                if os.path.isfile(volume_path):
-                    with zip.ZipFile.NewZipFile(
-                            self.resolver, volume_urn) as volume:
-                        if stream_name:
-                            return volume.urn, os.sep.join(stream_name)
-
-                        return volume.urn, None
-
-                elif os.path.isdir(volume_path):
-                    with aff4_directory.AFF4Directory.NewAFF4Directory(
-                            self.resolver, volume_urn) as volume:
-                        if stream_name:
-                            return volume.urn, os.sep.join(stream_name)
-
-                        return volume.urn, None
-
-                else:
-                    # volume_path is not valid.
-                    return None, None
-
-            elif volume_urn_parts.scheme == "gs" and aff4_cloud:
-                with aff4_cloud.AFF4GStore.NewAFF4GStore(
-                        self.resolver, volume_urn) as volume:
+            if os.path.isfile(volume_path):
+                with zip.ZipFile.NewZipFile(
+                        self.resolver,
+                        rdfvalue.URN.NewURNFromFilename(volume_path)) as volume:
                     if stream_name:
                         return volume.urn, os.sep.join(stream_name)
 
                     return volume.urn, None
 
-            # File does not exist - maybe the path stem points at a stream in
-            # the image.
-            else:
-                stream_name.insert(0, path_components.pop(-1))
+            stream_name.insert(0, path_components.pop(-1))
 
         raise IOError("Not found")
 
-    def _AutoLoadAFF4Volume(self, path):
-        with self.resolver.AFF4FactoryOpen(path) as volume:
-            self.volume_urn = volume.urn
+    def _AutoLoadAFF4Volume(self, volume_urn):
+        # The volume was already opened by _LocateAFF4Volume() so its metadata
+        # is in the resolver and there is no need to open it again.
+        self.volume_urn = volume_urn
 
-            # We are searching for images with the physical memory category.
-            for (subject, _, value) in self.resolver.QueryPredicate(
-                    lexicon.AFF4_CATEGORY):
-                if value == lexicon.AFF4_MEMORY_PHYSICAL:
-                    self._LoadMemoryImage(subject)
-                    break
+        # We are searching for images with the physical memory category.
+        for (subject, _, value) in self.resolver.QueryPredicate(
+                lexicon.AFF4_CATEGORY):
+            if value == lexicon.AFF4_MEMORY_PHYSICAL:
+                self._LoadMemoryImage(subject)
+                break
 
         self.as_assert(self.image is not None,
                        "No physical memory categories found.")
 
-        self.filenames = {}
+    def _ensure_filenames(self):
+        """Returns the filenames map, building it on first use.
+
+        Most plugins never map files from the image so we avoid scanning all
+        the subjects in the resolver until they are needed.
+        """
+        if self._filenames is None:
+            self._filenames = self._build_filenames_map()
+
+            # Maps the lower cased filenames to the names in the volume for
+            # case insensitive lookups.
+            self._lower_filenames = dict(
+                (filename.lower(), filename) for filename in self._filenames)
+
+        return self._filenames
+
+    @property
+    def filenames(self):
+        return self._ensure_filenames()
+
+    def _build_filenames_map(self):
         # Newer AFF4 images should have the AFF4_STREAM_ORIGINAL_FILENAME
         # attribute set.
-        for (subject, _, value) in self.resolver.QueryPredicate(
-                lexicon.AFF4_STREAM_ORIGINAL_FILENAME):
-            # Normalize the filename for case insensitive filesysyems.
-            self.filenames[unicode(value).lower()] = subject
+        original_filenames = [
+            (subject, unicode(value))
+            for subject, _, value in self.resolver.QueryPredicate(
+                lexicon.AFF4_STREAM_ORIGINAL_FILENAME)]
+
+        recorded_subjects = set(
+            utils.SmartUnicode(subject) for subject, _ in original_filenames)
+
+        filenames = {}
 
         # TODO: Deprecate this guessing once all images have the
         # AFF4_STREAM_ORIGINAL_FILENAME attribute.
-        for subject in self.resolver.QuerySubject(re.compile(".")):
-            relative_name = self.volume_urn.RelativePath(subject)
-            if relative_name:
-                filename = self._normalize_filename(relative_name)
-                self.filenames[filename] = subject
+        if self.volume_urn is not None:
+            for subject in self.resolver.QuerySubject(re.compile(".")):
+                if utils.SmartUnicode(subject) in recorded_subjects:
+                    continue
+
+                relative_name = self.volume_urn.RelativePath(subject)
+                if relative_name:
+                    filename = self._normalize_filename(relative_name)
+                    filenames[filename] = subject
+
+        # The recorded filenames always take precedence over guessed ones.
+        filenames.update(
+            (filename, subject) for subject, filename in original_filenames)
+
+        return filenames
 
     def _normalize_filename(self, filename):
         """Normalize the filename based on the source OS."""
-        m = re.match(r"/?([a-zA-Z]:[/\\].+)", filename)
-        if m:
-            # This is a windows filename.
-            filename = m.group(1).replace("/", "\\")
+        return NormalizeFilename(filename)
 
-            return filename.lower()
+    def _find_filename(self, filename):
+        """Returns the name of filename in the volume or None.
 
-        return filename
+        An exact match is preferred, otherwise fall back to a case insensitive
+        match.
+        """
+        if filename in self._ensure_filenames():
+            return filename
+
+        return self._lower_filenames.get(filename.lower())
+
+    def _find_subject(self, filename):
+        """Returns the URN of the stream for the filename or None."""
+        name = self._find_filename(filename)
+        if name is not None:
+            return self._filenames[name]
 
     def _LoadMemoryImage(self, image_urn):
         aff4_stream = self.resolver.AFF4FactoryOpen(image_urn)
-        self.image = AFF4StreamWrapper(aff4_stream)
+        self.image = AFF4StreamWrapper(
+            aff4_stream, prefetch=self.session.GetParameter("aff4_prefetch"))
 
         # Add the ranges if this is a map.
         try:
-            for map_range in aff4_stream.GetRanges():
-                self.add_run(map_range.map_offset,
-                             map_range.map_offset,
-                             map_range.length,
-                             self.image)
-
+            ranges = aff4_stream.GetRanges()
         except AttributeError:
-            self.add_run(0, 0, aff4_stream.Size(), self.image)
+            ranges = None
+
+        if ranges is not None:
+            physical_runs = sorted(
+                (map_range.map_offset, map_range.length)
+                for map_range in ranges)
+        else:
+            physical_runs = [(0, aff4_stream.Size())]
+
+        self.add_runs(((start, start, length)
+                       for start, length in physical_runs), self.image)
+
+        # Flat lists of the physical memory runs for fast lookups in
+        # describe().
+        self._physical_starts = [start for start, _ in physical_runs]
+        self._physical_ends = [start + length
+                               for start, length in physical_runs]
 
         self.session.logging.info("Added %s as physical memory", image_urn)
 
+    def close(self):
+        if self.image is not None:
+            self.image.close()
+
     def ConfigureSession(self, session):
         self._parse_physical_memory_metadata(session, self.image.stream.urn)
 
-    def file_mapping_offset(self, filename):
+    def file_mapping_offset(self, filename, size=0):
         """Returns the offset where the filename should be mapped.
 
         This function manages the session cache. By storing the file mappings in
         the session cache we can guarantee repeatable mappings.
         """
+        if self._next_mapping_offset is None:
+            self._next_mapping_offset = self._align_mapping(self.end())
+
         mapped_files = self.session.GetParameter("file_mappings", {})
-        if filename in mapped_files:
-            return utils.CaseInsensitiveDictLookup(
-                filename, mapped_files)
+        mapped_offset = mapped_files.get(filename)
+        if mapped_offset is None:
+            mapped_offset = self._next_mapping_offset
+            mapped_files[filename] = mapped_offset
 
-        # Give a bit of space for the mapping and page align it.
-        mapped_offset = (self.end() + 0x10000) & 0xFFFFFFFFFFFFF000
-        mapped_files[filename] = mapped_offset
+            self.session.SetCache("file_mappings", mapped_files)
 
-        self.session.SetCache("file_mappings", mapped_files)
+        # Keep track of the end of the mappings so we do not need to walk all
+        # the runs to find it each time.
+        self._next_mapping_offset = max(
+            self._next_mapping_offset,
+            self._align_mapping(mapped_offset + size))
 
         return mapped_offset
 
+    def _align_mapping(self, offset):
+        # Give a bit of space for the mapping and page align it.
+        return (offset + 0x10000) & 0xFFFFFFFFFFFFF000
+
     def get_file_address_space(self, filename):
         """Return an address space for filename."""
-        subject = utils.CaseInsensitiveDictLookup(
-            filename, self.filenames)
-
+        subject = self._find_subject(filename)
         if subject:
-            return AFF4StreamWrapper(self.resolver.AFF4FactoryOpen(subject))
+            return AFF4StreamWrapper(self.resolver.AFF4FactoryOpen(subject),
+                                     cache=True)
         return
 
     def get_mapped_offset(self, filename, file_offset=0):
@@ -295,41 +562,45 @@ class AFF4AddressSpace(addrspace.CachingAddressSpaceMixIn,
 
         If the file is not mapped, return None.
         """
-        mapped_offset = None
         filename = self._normalize_filename(filename)
-        mapped_offset = utils.CaseInsensitiveDictLookup(
-            filename, self.mapped_files)
+        mapped_offset = self.mapped_files.get(filename)
         if mapped_offset is None:
+            if filename in self.missing_files:
+                return
+
             # Try to map the file.
-            subject = utils.CaseInsensitiveDictLookup(
-                filename, self.filenames)
+            name = self._find_filename(filename)
 
             # Fall back to looking up the sysnative path in case the
             # image was acquired by a 32 bit imager.
-            if not subject:
+            if name is None:
                 # The 32 bit WinPmem imager access native files via
                 # SysNative but they are really located in System32.
-                subject = utils.CaseInsensitiveDictLookup(
-                    filename.replace("SysNative", "System32"),
-                    self.filenames)
+                name = self._lower_filenames.get(
+                    filename.lower().replace("sysnative", "system32"))
+
+            if name is None:
+                # Cache failures too.
+                self.missing_files.add(filename)
+                return
 
-            if subject:
-                stream = self.resolver.AFF4FactoryOpen(subject)
-                mapped_offset = self.file_mapping_offset(filename)
+            # The file may already be mapped under a name with different case.
+            mapped_offset = self.mapped_files.get(name)
+            if mapped_offset is None:
+                stream = self.resolver.AFF4FactoryOpen(self._filenames[name])
+                mapped_offset = self.file_mapping_offset(name, stream.Size())
                 self.add_run(mapped_offset, 0, stream.Size(),
                              AFF4StreamWrapper(stream))
 
                 self.session.logging.info(
                     "Mapped %s into address %#x", stream.urn, mapped_offset)
 
-            else:
-                # Cache failures too.
-                mapped_offset = -1
+                self.mapped_files[name] = mapped_offset
 
-        # Cache for next time.
-        self.mapped_files[filename] = mapped_offset
-        if mapped_offset > 0:
-            return mapped_offset + file_offset
+            # Cache for next time.
+            self.mapped_files[filename] = mapped_offset
+
+        return mapped_offset + file_offset
 
     _parameter = [
         ("dtb", "Registers.CR3"),
@@ -337,36 +608,70 @@ class AFF4AddressSpace(addrspace.CachingAddressSpaceMixIn,
         ("vm_kernel_slide", "kaslr_slide")
     ]
 
+    # The largest information.yaml file we are willing to read.
+    MAX_METADATA_SIZE = 10 * 1024 * 1024
+
+    def _load_metadata(self, session, image_urn):
+        """Returns the information.yaml metadata, reading it only once."""
+        if self._metadata is None:
+            try:
+                with self.resolver.AFF4FactoryOpen(
+                        image_urn.Append("information.yaml")) as fd:
+                    self._metadata = yaml_utils.decode(
+                        fd.read(min(fd.Size(), self.MAX_METADATA_SIZE))) or {}
+            except IOError:
+                session.logging.info(
+                    "AFF4 volume does not contain %s/information.yaml" %
+                    image_urn)
+                self._metadata = {}
+
+        return self._metadata
+
     def _parse_physical_memory_metadata(self, session, image_urn):
-        try:
-            with self.resolver.AFF4FactoryOpen(
-                    image_urn.Append("information.yaml")) as fd:
-                metadata = yaml_utils.decode(fd.read(10000000))
-                for session_param, info_para in self._parameter:
-                    # Allow the user to override the AFF4 file.
-                    if session.HasParameter(session_param):
-                        continue
-
-                    tmp = metadata
-                    value = None
-                    for key in info_para.split("."):
-                        value = tmp.get(key)
-                        if value is None:
-                            break
-
-                        tmp = value
-
-                    if value is not None:
-                        session.SetCache(session_param, value, volatile=False)
-        except IOError:
-            session.logging.info(
-                "AFF4 volume does not contain %s/information.yaml" % image_urn)
+        # Nothing to do if the user has overridden all the parameters.
+        if all(session.HasParameter(session_param)
+               for session_param, _ in self._parameter):
+            return
+
+        metadata = self._load_metadata(session, image_urn)
+        if not metadata:
+            return
+
+        for session_param, info_para in self._parameter:
+            # Allow the user to override the AFF4 file.
+            if session.HasParameter(session_param):
+                continue
+
+            tmp = metadata
+            value = None
+            for key in info_para.split("."):
+                value = tmp.get(key)
+                if value is None:
+                    break
+
+                tmp = value
+
+            if value is not None:
+                session.SetCache(session_param, value, volatile=False)
 
     def describe(self, address):
-        start, _, run = self.runs.get_containing_range(address)
-        if start is None:
-            # For unmapped streams just say we have no idea.
-            return u"%#x (Unmapped)" % address
+        # Most addresses are in physical memory so check those runs first.
+        i = bisect.bisect_right(self._physical_starts, address) - 1
+        if i >= 0 and address < self._physical_ends[i]:
+            return u"%#x" % address
+
+        # Consecutive addresses usually fall in the same run so check the last
+        # run we found first.
+        cached = self._describe_cache
+        if cached is not None and cached[0] <= address < cached[1]:
+            start, _, run = cached
+        else:
+            start, end, run = self.runs.get_containing_range(address)
+            if start is None:
+                # For unmapped streams just say we have no idea.
+                return u"%#x (Unmapped)" % address
+
+            self._describe_cache = (start, end, run)
 
         # For normal physical memory addresses just be concise.
         if run.address_space == self.image:
@@ -379,30 +684,33 @@ class AFF4AddressSpace(addrspace.CachingAddressSpaceMixIn,
 
 
 # pylint: disable=unused-import, wrong-import-order
-# Add these so that pyinstaller builds these dependencies in.
-import rdflib.plugins.memory
-import rdflib.plugins.parsers.hturtle
-import rdflib.plugins.parsers.notation3
-import rdflib.plugins.parsers.nquads
-import rdflib.plugins.parsers.nt
-import rdflib.plugins.parsers.rdfxml
-import rdflib.plugins.parsers.structureddata
-import rdflib.plugins.parsers.trig
-import rdflib.plugins.parsers.trix
-import rdflib.plugins.serializers.n3
-import rdflib.plugins.serializers.nquads
-import rdflib.plugins.serializers.nt
-import rdflib.plugins.serializers.rdfxml
-import rdflib.plugins.serializers.trig
-import rdflib.plugins.serializers.trix
-import rdflib.plugins.serializers.turtle
-import rdflib.plugins.sleepycat
-import rdflib.plugins.sparql.processor
-import rdflib.plugins.sparql.results.csvresults
-import rdflib.plugins.sparql.results.jsonresults
-import rdflib.plugins.sparql.results.tsvresults
-import rdflib.plugins.sparql.results.txtresults
-import rdflib.plugins.sparql.results.xmlresults
-import rdflib.plugins.stores.auditable
-import rdflib.plugins.stores.concurrent
-import rdflib.plugins.stores.sparqlstore
+# Add these so that pyinstaller builds these dependencies in. Pyinstaller finds
+# the imports statically so there is no need to pay for importing them unless we
+# are actually running from a pyinstaller bundle.
+if getattr(sys, "frozen", None):
+    import rdflib.plugins.memory
+    import rdflib.plugins.parsers.hturtle
+    import rdflib.plugins.parsers.notation3
+    import rdflib.plugins.parsers.nquads
+    import rdflib.plugins.parsers.nt
+    import rdflib.plugins.parsers.rdfxml
+    import rdflib.plugins.parsers.structureddata
+    import rdflib.plugins.parsers.trig
+    import rdflib.plugins.parsers.trix
+    import rdflib.plugins.serializers.n3
+    import rdflib.plugins.serializers.nquads
+    import rdflib.plugins.serializers.nt
+    import rdflib.plugins.serializers.rdfxml
+    import rdflib.plugins.serializers.trig
+    import rdflib.plugins.serializers.trix
+    import rdflib.plugins.serializers.turtle
+    import rdflib.plugins.sleepycat
+    import rdflib.plugins.sparql.processor
+    import rdflib.plugins.sparql.results.csvresults
+    import rdflib.plugins.sparql.results.jsonresults
+    import rdflib.plugins.sparql.results.tsvresults
+    import rdflib.plugins.sparql.results.txtresults
+    import rdflib.plugins.sparql.results.xmlresults
+    import rdflib.plugins.stores.auditable
+    import rdflib.plugins.stores.concurrent
+    import rdflib.plugins.stores.sparqlstore
@@ -0,0 +1,118 @@
+"""Tests for the AFF4 address space."""
+import gc
+import StringIO
+
+from rekall import testlib
+from rekall.plugins.addrspaces import aff4
+
+
+class FakeStream(object):
+    """A minimal stand in for a pyaff4 stream."""
+
+    def __init__(self, data, urn=u"aff4://fake/stream"):
+        self.fd = StringIO.StringIO(data)
+        self.data = data
+        self.urn = urn
+        self.reads = 0
+
+    def seek(self, offset):
+        self.fd.seek(offset)
+
+    def read(self, length):
+        self.reads += 1
+        return self.fd.read(length)
+
+    def Size(self):
+        return len(self.data)
+
+
+class AFF4StreamWrapperTestBase(testlib.RekallBaseUnitTestCase):
+    """Common data and checks for the AFF4StreamWrapper tests."""
+
+    def setUp(self):
+        # A pattern which is different in every block.
+        self.data = "".join(chr(i % 251) for i in range(
+            aff4.AFF4StreamWrapper.BLOCK_SIZE * 3 + 100))
+
+    def CheckReads(self, wrapper):
+        block_size = wrapper.BLOCK_SIZE
+        for offset, length in [(0, 10),
+                               (5, 100),
+                               (block_size - 5, 10),  # Spans blocks.
+                               (block_size, block_size),
+                               (block_size * 2 + 7, 3),
+                               (len(self.data) - 10, 20),  # Past the end.
+                               (len(self.data) + 10, 10)]:
+            self.assertEqual(wrapper.read(offset, length),
+                             self.data[offset:offset + length])
+
+
+class AFF4StreamWrapperTest(AFF4StreamWrapperTestBase):
+    """Test the AFF4StreamWrapper."""
+
+    def testUncachedRead(self):
+        stream = FakeStream(self.data)
+        wrapper = aff4.AFF4StreamWrapper(stream)
+        self.CheckReads(wrapper)
+
+        self.assertEqual(wrapper.end(), len(self.data))
+        self.assertEqual(unicode(wrapper), u"aff4://fake/stream")
+
+    def testCachedRead(self):
+        stream = FakeStream(self.data)
+        wrapper = aff4.AFF4StreamWrapper(stream, cache=True)
+        self.CheckReads(wrapper)
+
+    def testCachedReadsShareBlocks(self):
+        stream = FakeStream(self.data)
+        wrapper = aff4.AFF4StreamWrapper(stream, cache=True)
+
+        # Small reads within the same block are served from the cache.
+        self.assertEqual(wrapper.read(10, 10), self.data[10:20])
+        self.assertEqual(wrapper.read(20, 10), self.data[20:30])
+        self.assertEqual(wrapper.read(0, 30), self.data[:30])
+        self.assertEqual(stream.reads, 1)
+
+
+class FastPollingStreamWrapper(aff4.AFF4StreamWrapper):
+    PREFETCH_TIMEOUT = 0.05
+
+
+class AFF4PrefetchTest(AFF4StreamWrapperTestBase):
+    """Test the AFF4StreamWrapper with prefetching."""
+
+    def testPrefetchRead(self):
+        wrapper = FastPollingStreamWrapper(FakeStream(self.data), prefetch=True)
+        self.CheckReads(wrapper)
+
+        # Sequential reads.
+        for offset in range(0, len(self.data), 4096):
+            self.assertEqual(wrapper.read(offset, 4096),
+                             self.data[offset:offset + 4096])
+
+        wrapper.close()
+
+    def testCloseStopsWorker(self):
+        wrapper = FastPollingStreamWrapper(FakeStream(self.data), prefetch=True)
+        worker = wrapper._prefetch_worker
+        self.assertTrue(worker.is_alive())
+
+        wrapper.close()
+        worker.join(5)
+        self.assertFalse(worker.is_alive())
+
+    def testWorkerExitsWhenWrapperIsCollected(self):
+        wrapper = FastPollingStreamWrapper(FakeStream(self.data), prefetch=True)
+        worker = wrapper._prefetch_worker
+
+        # Make the wrapper only collectable by the cycle collector.
+        wrapper.cycle = wrapper
+        del wrapper
+        gc.collect()
+
+        worker.join(5)
+        self.assertFalse(worker.is_alive())
+
+
+if __name__ == "__main__":
+    testlib.main()
@@ -349,6 +349,35 @@ class CommandWrapper(object):
 applicative.IApplicative.implicit_static(CommandWrapper)
 
 
+# Parsed queries keyed by their source and parameters. The same queries tend to
+# be run many times (e.g. by agent flows) so we only parse them once.
+QUERY_CACHE = utils.FastStore(max_size=100, lock=True)
+
+
+def ParseQuery(source, params=None):
+    """Returns a parsed efilter Query, reusing a cached one if possible.
+
+    Parameters are bound when the query is parsed so they must be part of the
+    cache key. Params may be positional (a sequence) or keyword (a dict).
+    """
+    if isinstance(params, dict):
+        key = (source, tuple(sorted(params.iteritems())))
+    else:
+        key = (source, tuple(params or ()))
+
+    try:
+        return QUERY_CACHE.Get(key)
+    except KeyError:
+        pass
+    except TypeError:
+        # Unhashable query source or parameters can not be cached.
+        return q.Query(source, params=params)
+
+    query = q.Query(source, params=params)
+    QUERY_CACHE.Put(key, query)
+    return query
+
+
 class EfilterPlugin(plugin.TypedProfileCommand, plugin.Command):
     """Abstract base class for plugins that do something with queries.
 
@@ -373,8 +402,8 @@ class EfilterPlugin(plugin.TypedProfileCommand, plugin.Command):
         super(EfilterPlugin, self).__init__(*args, **kwargs)
 
         try:
-            self.query = q.Query(self.plugin_args.query,
-                                 params=self.plugin_args.query_parameters)
+            self.query = ParseQuery(self.plugin_args.query,
+                                    params=self.plugin_args.query_parameters)
         except errors.EfilterError as error:
             self.query_error = error
             self.query = None
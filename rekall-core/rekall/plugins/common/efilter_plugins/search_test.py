@@ -0,0 +1,37 @@
+"""Tests for the efilter search plugin."""
+from efilter.transforms import asdottysql
+
+from rekall import testlib
+from rekall.plugins.common.efilter_plugins import search
+
+
+class ParseQueryTest(testlib.RekallBaseUnitTestCase):
+    """Test the parsed query cache."""
+
+    def testPositionalParameters(self):
+        source = "select * from pslist() where pid == ?"
+        query = search.ParseQuery(source, [1])
+
+        self.assertIs(search.ParseQuery(source, [1]), query)
+        self.assertIs(search.ParseQuery(source, (1,)), query)
+
+        other = search.ParseQuery(source, [2])
+        self.assertIsNot(other, query)
+        self.assertIn("pid == 2", asdottysql.asdottysql(other))
+
+    def testKeywordParameters(self):
+        source = "select * from pslist() where proc.name == {name}"
+        query = search.ParseQuery(source, dict(name="foo"))
+
+        self.assertIs(search.ParseQuery(source, dict(name="foo")), query)
+
+        # Parameters are bound at parse time so different values must not
+        # share the cached query.
+        other = search.ParseQuery(source, dict(name="bar"))
+        self.assertIsNot(other, query)
+        self.assertIn("'bar'", asdottysql.asdottysql(other))
+        self.assertIn("'foo'", asdottysql.asdottysql(query))
+
+
+if __name__ == "__main__":
+    testlib.main()
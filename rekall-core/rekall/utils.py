@@ -743,6 +743,11 @@ class RangedCollection(object):
         end = int(end)
         self.collection[(start, end)] = data
 
+    def update(self, ranges):
+        """Insert many (start, end, data) tuples in one operation."""
+        self.collection.update(
+            ((int(start), int(end)), data) for start, end, data in ranges)
+
     def get_next_range_start(self, address):
         """Gets the start address of the next range larger than address."""
         range, _ = self.collection.get_value_larger_than((address, None))
@@ -1,6 +1,12 @@
 import yaml
 import collections
 
+# Use the libyaml based loader when it is available since it is much faster.
+try:
+    SafeLoader = yaml.CSafeLoader
+except AttributeError:
+    SafeLoader = yaml.SafeLoader
+
 
 class OrderedYamlDict(yaml.YAMLObject, collections.OrderedDict):
     """A class which produces an ordered dict."""
@@ -53,7 +59,7 @@ class OrderedYamlDict(yaml.YAMLObject, collections.OrderedDict):
 
 
 def decode(data):
-    return yaml.safe_load(data) or OrderedYamlDict()
+    return yaml.load(data, Loader=SafeLoader) or OrderedYamlDict()
 
 def encode(raw_data):
     return yaml.safe_dump(raw_data, default_flow_style=False)